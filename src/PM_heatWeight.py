@@ -167,17 +167,41 @@ __doc__ = __doc__ % str(version)
 
 import subprocess
 import tempfile
+import contextlib
+import logging
+import mmap
 import os
 import os.path
 import platform
 import traceback
 
+import numpy as np
+
+# numba is optional - if present, the bone-to-joint remap runs as a
+# compiled kernel parallelized across vertices
+try:
+    from numba import njit, prange
+except ImportError:
+    _remapKernel = None
+else:
+    @njit(parallel=True, cache=True)
+    def _remapKernel(vertBone, boneToJoint, out, rowTotals):
+        numVertices, numBones = vertBone.shape
+        for vertIndex in prange(numVertices):
+            rowTotal = 0.0
+            for boneIndex in range(numBones):
+                value = vertBone[vertIndex, boneIndex]
+                out[vertIndex, boneToJoint[boneIndex]] += value
+                rowTotal += value
+            rowTotals[vertIndex] = rowTotal
+
 import maya.cmds as cmds #@UnresolvedImport
-import maya.mel as mel
 import maya.OpenMaya as api
 import maya.OpenMayaAnim as apiAnim
 
-DEBUG = False
+# for verbose traces, do:
+#   logging.getLogger('PM_heatWeight').setLevel(logging.DEBUG)
+_logger = logging.getLogger(__name__)
 
 _PINOCCHIO_DIR = os.path.join(os.path.dirname(__file__))
 _PINOCCHIO_BIN = os.path.join(_PINOCCHIO_DIR, 'AttachWeights')
@@ -209,17 +233,20 @@ def pinocchioSkeletonExport(skeletonRoot, skelFile=None,
         skelFile = browseForFile(m=1, actionName='Export')
     skelList = makePinocchioSkeletonList(skeletonRoot,
                                 directDescendentsOnly=directDescendentsOnly)
+    jointCoords = _worldTranslations([joint for joint, parentIndex
+                                      in skelList])
+    # build the whole file contents first, so we do one big write
+    # instead of one small write per joint
+    lines = []
+    for jointIndex, (joint, parentIndex) in enumerate(skelList):
+        _logger.debug("%s : %s %s %s", joint, jointIndex,
+                      jointCoords[jointIndex], parentIndex)
+        x, y, z = jointCoords[jointIndex]
+        lines.append("%d %.5f %.5f %.5f %d\r\n" % (jointIndex, x, y, z,
+                                                   parentIndex))
     fileObj = open(skelFile, mode="w")
     try:
-        for jointIndex, (joint, parentIndex) in enumerate(skelList):
-            jointCoords = getTranslation(joint, space='world')
-            if DEBUG:
-                print joint, ":", jointIndex, jointCoords, parentIndex
-            fileObj.write("%d %.5f %.5f %.5f %d\r\n" % (jointIndex,
-                                                        jointCoords[0],
-                                                        jointCoords[1],
-                                                        jointCoords[2],
-                                                        parentIndex))
+        fileObj.write(''.join(lines))
     finally:
         fileObj.close()
     return (skelFile, skelList)
@@ -274,28 +301,52 @@ def pinocchioSkeletonImport(skelFile):
     return rootNode
 
 def pinocchioObjExport(mesh, objFilePath):
-    loadObjPlugin()
-    savedSel = cmds.ls(sl=1)
-    try:
+    with preservedSelection():
         if not isATypeOf(mesh, 'geometryShape'):
             subShape = getShape(mesh)
             if subShape:
                 mesh = subShape
         if not isATypeOf(mesh, 'geometryShape'):
             raise TypeError('cannot find a geometry shape for %s' % mesh)
-            
+
+        # We still need a duplicate, since closing open borders alters
+        # the topology - but triangulation is done on the fly by
+        # MFnMesh.getTriangles, so there's no polyTriangulate pass (and
+        # no need for the OBJexport plugin)
         meshDup = addShape(mesh)
         cmds.polyCloseBorder(meshDup, ch=0)
-        cmds.polyTriangulate(meshDup, ch=0)
-        cmds.select(meshDup, r=1)
-        cmds.file(objFilePath,
-                op="groups=0;ptgroups=0;materials=0;smoothing=0;normals=0",
-                typ="OBJexport", es=True, f=1)
+        _writeTriangulatedObj(meshDup, objFilePath)
         cmds.delete(meshDup)
-    finally:
-        cmds.select(savedSel)
     return objFilePath
 
+def _writeTriangulatedObj(mesh, objFilePath):
+    """
+    Writes the given poly shape to a minimal triangulated .obj file -
+    just world-space vertices and triangle faces, which is all that
+    pinocchio reads.
+    """
+    mfnMesh = api.MFnMesh(toMDagPath(mesh))
+    points = api.MPointArray()
+    mfnMesh.getPoints(points, api.MSpace.kWorld)
+    triangleCounts = api.MIntArray()
+    triangleVerts = api.MIntArray()
+    mfnMesh.getTriangles(triangleCounts, triangleVerts)
+
+    lines = []
+    for i in xrange(points.length()):
+        point = points[i]
+        lines.append("v %.6f %.6f %.6f\n" % (point.x, point.y, point.z))
+    # obj face indices are 1-based
+    for i in xrange(0, triangleVerts.length(), 3):
+        lines.append("f %d %d %d\n" % (triangleVerts[i] + 1,
+                                       triangleVerts[i + 1] + 1,
+                                       triangleVerts[i + 2] + 1))
+    fileObj = open(objFilePath, "w")
+    try:
+        fileObj.write(''.join(lines))
+    finally:
+        fileObj.close()
+
 
 def makePinocchioSkeletonList(rootJoint,
                               directDescendentsOnly=False):
@@ -313,48 +364,119 @@ def makePinocchioSkeletonList(rootJoint,
     return _makePinocchioSkeletonList([], rootJoint, -1,
                                                  directDescendentsOnly=directDescendentsOnly)
 
-def _makePinocchioSkeletonList(skelList, newJoint, parentIndex,
+def _makePinocchioSkeletonList(skelList, rootJoint, rootParentIndex,
                                         directDescendentsOnly=False):
-    if isATypeOf(newJoint, 'joint'):
-        nextParentIndex = len(skelList)
-        skelList.append((newJoint, parentIndex))
-    else:
-        nextParentIndex = parentIndex
-    kwargs = {'children':True, 'noIntermediate':True, 'fullPath':True}
-    if directDescendentsOnly:
-        kwargs['type'] = 'joint'
-    directChildren = listForNone(cmds.listRelatives(newJoint, **kwargs))
-    for child in directChildren:
-        _makePinocchioSkeletonList(skelList, child, nextParentIndex)
+    # Iterative depth-first traversal (parents still always declared
+    # before their children) - a sufficiently deep joint chain could
+    # otherwise blow python's recursion limit
+    stack = [(rootJoint, rootParentIndex, directDescendentsOnly)]
+    while stack:
+        newJoint, parentIndex, jointsOnly = stack.pop()
+        if isATypeOf(newJoint, 'joint'):
+            nextParentIndex = len(skelList)
+            skelList.append((newJoint, parentIndex))
+        else:
+            nextParentIndex = parentIndex
+        kwargs = {'children':True, 'noIntermediate':True, 'fullPath':True}
+        if jointsOnly:
+            kwargs['type'] = 'joint'
+        directChildren = listForNone(cmds.listRelatives(newJoint, **kwargs))
+        # push in reverse, so children are popped in their original order
+        for child in reversed(directChildren):
+            stack.append((child, nextParentIndex, False))
     return skelList
 
+def _remapBoneWeights(vertBoneWeights, boneIndexToJointIndex, numJoints):
+    """
+    Scatter-adds every bone's weight column onto its joint's column.
+
+    Multiple bones can correspond to a single joint, so the various
+    bones' values are accumulated rather than overwritten. Returns
+    (vertJointWeights, rowTotals) - the remap only redistributes each
+    row, so the totals double as the normalization check, and with
+    numba installed both come out of a single fused parallel pass over
+    the weights. The numpy fallback does each vectorized.
+
+    vertJointWeights comes back C-contiguous, so its ravel() is already
+    the flat layout MFnSkinCluster.setWeights expects - no extra copy.
+    """
+    numVertices = vertBoneWeights.shape[0]
+    vertJointWeights = np.zeros((numVertices, numJoints), dtype=np.float64)
+    if _remapKernel is not None:
+        rowTotals = np.empty(numVertices, dtype=np.float64)
+        _remapKernel(vertBoneWeights, boneIndexToJointIndex,
+                     vertJointWeights, rowTotals)
+    else:
+        np.add.at(vertJointWeights,
+                  (np.arange(numVertices)[:, None],
+                   boneIndexToJointIndex[None, :]),
+                  vertBoneWeights)
+        rowTotals = vertJointWeights.sum(axis=1)
+    return vertJointWeights, rowTotals
+
+def _vertRangeComponents(mesh, vertIndices):
+    """
+    Packs an ascending list of vert indices into as few 'mesh.vtx[a:b]'
+    component strings as possible, merging contiguous runs - far fewer
+    strings for maya to build and parse than one per vert.
+    """
+    prefix = "%s.vtx[" % mesh
+    components = []
+    runStart = runEnd = vertIndices[0]
+    for vertIndex in vertIndices[1:]:
+        if vertIndex == runEnd + 1:
+            runEnd = vertIndex
+            continue
+        if runStart == runEnd:
+            components.append("%s%d]" % (prefix, runStart))
+        else:
+            components.append("%s%d:%d]" % (prefix, runStart, runEnd))
+        runStart = runEnd = vertIndex
+    if runStart == runEnd:
+        components.append("%s%d]" % (prefix, runStart))
+    else:
+        components.append("%s%d:%d]" % (prefix, runStart, runEnd))
+    return components
+
 def pinocchioWeightsImport(mesh, skin, skelList, weightFile=None,
                            undoable=False):
     #Ensure that all influences in the skelList are influences for the skin
     allInfluences = influenceObjects(skin)
+    knownInfluences = set(_canonical(x) for x in allInfluences)
     pinocInfluences = [joint for joint, parent in skelList]
-    for joint in pinocInfluences:
-        if not nodeIn(joint, allInfluences):
-            cmds.skinCluster(skin, edit=1, addInfluence=joint)
+    # map from canonical node identity to index in pinocInfluences, so
+    # influence lookups are O(1) dict hits instead of linear scans that
+    # compare names via isSameObject
+    influenceIndexMap = {}
+    missingInfluences = []
+    for jointIndex, joint in enumerate(pinocInfluences):
+        jointHash = _canonical(joint)
+        influenceIndexMap[jointHash] = jointIndex
+        if jointHash not in knownInfluences:
+            missingInfluences.append(joint)
+    if missingInfluences:
+        # addInfluence is a multi-use flag, so all missing joints can be
+        # added with a single skinCluster edit
+        cmds.skinCluster(skin, edit=1, addInfluence=missingInfluences)
+        # the skin's influence list (and its physical ordering) changed -
+        # requery it; otherwise reuse what we already have
+        allInfluences = influenceObjects(skin)
 
     if weightFile is None:
         weightFile = browseForFile(m=0, actionName='Import')
     vertBoneWeights = readPinocchioWeights(weightFile)
-    numVertices = len(vertBoneWeights)
-    numBones = len(vertBoneWeights[0])
+    numVertices, numBones = vertBoneWeights.shape
     numJoints = len(skelList)
     numWeights = numVertices * numJoints
-    if DEBUG:
-        print "numVertices:", numVertices
-        print "numBones:", numBones
+    _logger.debug("numVertices: %s", numVertices)
+    _logger.debug("numBones: %s", numBones)
     assert numBones == numJoints - 1, \
            "numBones (%d) != numJoints (%d) - 1" % (numBones, numJoints)
 
     # Pinocchio sets weights per-bone... maya weights per joint.
     # Need to decide whether to assign the bone weight to the 'start' joint
     #   of the bone, or the 'end' joint
-    boneIndexToJointIndex = [0] * numBones
-    vertJointWeights = [[0] * numJoints for i in xrange(numVertices)]
+    boneIndexToJointIndex = np.zeros(numBones, dtype=np.intp)
 
     assignBoneToEndJoint = False
     if assignBoneToEndJoint:
@@ -364,55 +486,50 @@ def pinocchioWeightsImport(mesh, skin, skelList, weightFile=None,
         for jointIndex in xrange(1, numJoints):
             parentIndex = skelList[jointIndex][1]
             boneIndexToJointIndex[jointIndex - 1] = parentIndex
-    
-    for vertIndex, boneWeights in enumerate(vertBoneWeights):
-        assert abs(sum(boneWeights) - 1) < 0.1, \
-               "Output for vert %d not normalized - total was: %.03f" % \
-               (vertIndex, sum(boneWeights))
-        for boneIndex, boneValue in enumerate(boneWeights):
-            # multiple bones can correspond to a single joint -
-            # make sure to add the various bones values together!
-            jointIndex = boneIndexToJointIndex[boneIndex] 
-            vertJointWeights[vertIndex][jointIndex] += boneValue
-
-    if DEBUG:
-        print "vertJointWeights:"
-        for i, jointWeights in enumerate(vertJointWeights):
-            if i < 20:
-                print jointWeights
-            else:
-                print "..."
-                break
-    
+
+    vertJointWeights, rowTotals = _remapBoneWeights(vertBoneWeights,
+                                                    boneIndexToJointIndex,
+                                                    numJoints)
+    # the remap just redistributes each row, so its totals serve as the
+    # normalization check; on failure, report the first offending vert,
+    # as the old per-row assert did
+    unnormalized = np.abs(rowTotals - 1) >= 0.1
+    if unnormalized.any():
+        badVert = int(np.argmax(unnormalized))
+        raise AssertionError(
+            "Output for vert %d not normalized - total was: %.03f" %
+            (badVert, rowTotals[badVert]))
+
+    _logger.debug("vertJointWeights (first 20 rows):\n%s",
+                  vertJointWeights[:20])
+
     if not undoable:
-        # If we're using the non-undoable api method, there's a lot of setup
-        # we have to do first; want to do this before zeroing weights,
-        # in case there's an error 
-        apiWeights = api.MDoubleArray(numWeights, 0)
-        for vertIndex, jointWeights in enumerate(vertJointWeights):
-            for jointIndex, jointValue in enumerate(jointWeights):
-                apiWeights.set(jointValue, vertIndex * numJoints + jointIndex)
+        # Use the api methods to set skin weights - MUCH faster than using
+        # mel skinPercent, but api doesn't have built-in undo support, so
+        # flush the undo queue
+        # Build the flat weight array with a single bulk transfer, rather
+        # than numWeights separate python->api .set() calls
+        weightsUtil = api.MScriptUtil()
+        weightsUtil.createFromList(vertJointWeights.ravel().tolist(),
+                                   numWeights)
+        apiWeights = api.MDoubleArray(weightsUtil.asDoublePtr(), numWeights)
         apiJointIndices = api.MIntArray(numJoints, 0)
-        if DEBUG:
-            for jointIndex, (joint, parentIndex) in enumerate(skelList):
-                print jointIndex, (joint, parentIndex)
-        influences = influenceObjects(skin)
+        _logger.debug("skelList: %s", skelList)
+        influences = allInfluences
         for apiIndex, joint in enumerate(influences):
-            influenceIndex = getNodeIndex(joint, pinocInfluences)
+            influenceIndex = influenceIndexMap.get(_canonical(joint))
             if influenceIndex is None:
                 raise InfluenceNotFoundError("%r not found in influences for skin %r: %r" %
                                              (joint, skin, pinocInfluences))
             apiJointIndices.set(apiIndex, influenceIndex)
-        if DEBUG:
-            print "apiJointIndices:",
-            pyJointIndices = []
-            for i in xrange(apiJointIndices.length()):
-                pyJointIndices.append(apiJointIndices[i])
-            print pyJointIndices
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("apiJointIndices: %s",
+                          [apiJointIndices[i]
+                           for i in xrange(apiJointIndices.length())])
         apiComponents = api.MFnSingleIndexedComponent().create(api.MFn.kMeshVertComponent)
-        apiVertices = api.MIntArray(numVertices, 0)
-        for i in xrange(numVertices):
-            apiVertices.set(i, i)
+        vertsUtil = api.MScriptUtil()
+        vertsUtil.createFromList(range(numVertices), numVertices)
+        apiVertices = api.MIntArray(vertsUtil.asIntPtr(), numVertices)
         api.MFnSingleIndexedComponent(apiComponents).addElements(apiVertices) 
         mfnSkin = apiAnim.MFnSkinCluster(toMObject(skin))
         meshDag = toMDagPath(mesh)
@@ -423,15 +540,10 @@ def pinocchioWeightsImport(mesh, skin, skelList, weightFile=None,
         numInfluencesPtr.createFromInt(0) 
         mfnSkin.getWeights(meshDag, apiComponents, savedWeights,
                            numInfluencesPtr.asUintPtr())
-        
-    # Zero all weights (so if there's influences not among those we're
-    # importing, they will have zero influence)
-    cmds.skinPercent(skin, mesh, pruneWeights=100, normalize=False)
 
-    if not undoable:
-        # Use the api methods to set skin weights - MUCH faster than using
-        # mel skinPercent, but api doesn't have built-in undo support, so
-        # flush the undo queue
+        # No need to zero the old weights first - the influence mapping
+        # above covers every influence in the skin (it raises if one is
+        # missing), so setWeights replaces the entire weight table
         zeroedWeights = api.MDoubleArray()
         undoState = cmds.undoInfo(q=1, state=1)
         cmds.undoInfo(state=False)
@@ -443,7 +555,7 @@ def pinocchioWeightsImport(mesh, skin, skelList, weightFile=None,
                                    apiWeights,
                                    False,
                                    zeroedWeights)
-                print "successfully set weights!"
+                _logger.info("successfully set weights!")
             except Exception:
                 # There was a problem, restore the saved weights!
                 influenceIndices = api.MIntArray(len(influences), 0)
@@ -462,30 +574,52 @@ def pinocchioWeightsImport(mesh, skin, skelList, weightFile=None,
             cmds.undoInfo(state=undoState)
     else:
         # Use mel skinPercent - much slower, but undoable
+        # Zero all weights first (so if there's influences not among those
+        # we're importing, they will have zero influence - the loop below
+        # only sets each vert's nonzero joints)
+        cmds.skinPercent(skin, mesh, pruneWeights=100, normalize=False)
+
+        # Verts weighted identically are very common in pinocchio output
+        # (eg, all verts bound solely to one joint) - group them, so we
+        # make one skinPercent call per unique weighting rather than one
+        # per vert
+        roundedWeights = np.round(vertJointWeights, 6)
+        weightGroups = {}
+        groupOrder = []
+        for vertIndex in xrange(numVertices):
+            row = roundedWeights[vertIndex]
+            key = tuple((jointIndex, row[jointIndex])
+                        for jointIndex in np.nonzero(row)[0])
+            if key not in weightGroups:
+                weightGroups[key] = []
+                groupOrder.append(key)
+            weightGroups[key].append(vertIndex)
+
         cmds.progressWindow(title="Setting new weights...", isInterruptable=True,
                             max=numVertices)
         try:
             lastUpdateTime = cmds.timerX()
             updateInterval = .5
-            for vertIndex, vertJoints in enumerate(vertJointWeights):
-                jointValues = {}
+            vertsDone = 0
+            for key in groupOrder:
                 if cmds.progressWindow( query=True, isCancelled=True ) :
                     break
-                #print "weighting vert:", vertIndex
-                for jointIndex, jointValue in enumerate(vertJoints):
-                    if jointValue > 0:
-                        jointValues[pinocInfluences[jointIndex]] = jointValue
-        
+                vertIndices = weightGroups[key]
+                jointValues = [(pinocInfluences[jointIndex], float(jointValue))
+                               for jointIndex, jointValue in key]
+
                 if cmds.timerX(startTime=lastUpdateTime) > updateInterval:
                     cmds.progressWindow(edit=True,
-                                        progress=vertIndex,
-                                        status="Setting Vert: (%i of %i)" % (vertIndex, numVertices))
+                                        progress=vertsDone,
+                                        status="Setting Vert: (%i of %i)" % (vertsDone, numVertices))
                     lastUpdateTime = cmds.timerX()
-    
-                cmds.skinPercent(skin, mesh + ".vtx[%d]" % vertIndex, normalize=False,
-                                 transformValue=jointValues.items())
+
+                cmds.skinPercent(skin,
+                                 _vertRangeComponents(mesh, vertIndices),
+                                 normalize=False, transformValue=jointValues)
+                vertsDone += len(vertIndices)
         finally:
-            cmds.progressWindow(endProgress=True)    
+            cmds.progressWindow(endProgress=True)
 
 def useUndoableMethod():
     message = \
@@ -507,14 +641,27 @@ Which do you prefer?'''
         return True
 
 def readPinocchioWeights(weightFile):
-    weightList = []
-    fileObj = open(weightFile)
+    """
+    Reads the per-vertex bone weights output by the pinocchio binary.
+
+    Returns a 2-D numpy array of shape (numVertices, numBones). The file
+    is memory-mapped and parsed with a single np.fromstring call, which
+    beats even loadtxt's line-by-line reader on large outputs.
+    """
+    fileObj = open(weightFile, 'rb')
     try:
-        for line in fileObj:
-            weightList.append([float(x) for x in line.strip().split(' ')])
+        buf = mmap.mmap(fileObj.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            # pinocchio writes the same number of columns on every row,
+            # so the whole buffer can be parsed flat and then reshaped
+            # by the first line's width
+            numBones = len(buf.readline().split())
+            weights = np.fromstring(buf[:], dtype=np.float32, sep=' ')
+        finally:
+            buf.close()
     finally:
         fileObj.close()
-    return weightList
+    return weights.reshape(-1, numBones)
 
 def runPinocchioBin(meshFile, weightFile, fit=False, stiffness=1.0, skelOut="skeleton.out",
                     weightOut="weights.out"):
@@ -529,10 +676,8 @@ def runPinocchioBin(meshFile, weightFile, fit=False, stiffness=1.0, skelOut="ske
                   '-weightOut', weightOut]
     if fit:
         exeAndArgs.append('-fit')
-    if DEBUG:
-        print "Calling command line binary:"
-        print 'subprocess.call(%r)' % exeAndArgs
-        print ' '.join(exeAndArgs)
+    _logger.debug("Calling command line binary: subprocess.call(%r)",
+                  exeAndArgs)
     returnVal = subprocess.call(exeAndArgs)
     if returnVal != 0:
         raise PinocchioError("return code: %d" % returnVal)
@@ -577,9 +722,10 @@ def heatWeight(*args, **kwargs):
             myRoot|myTransform|otherJoint
         would NOT be allowed; if it is True, it would be.
     """
+    _inheritedTypesCache.clear()
     if not args:
         args = listForNone(cmds.ls(sl=1))
-    
+
     fit = kwargs.pop('fit', False)
     stiffness = kwargs.pop('stiffness', 1.0)
     tempOutputDir = kwargs.pop('tempOutputDir', None)
@@ -672,7 +818,7 @@ def heatWeight(*args, **kwargs):
                         if os.path.isfile(tempFile):
                             os.remove(tempFile)
         except Exception, e:
-            if DEBUG:
+            if _logger.isEnabledFor(logging.DEBUG):
                 exceptionInfo = traceback.format_exc()
             else:
                 exceptionInfo = str(e)
@@ -705,26 +851,55 @@ def heatWeight(*args, **kwargs):
 #    finally:
 #        fileObj.close()
 
+def _canonical(node):
+    """
+    Returns a hashable identity key for the given node name, so that
+    differently-spelled paths to the same node compare equal.
+    """
+    return api.MObjectHandle(toMObject(node)).hashCode()
+
 def nodeIn(node, nodeList):
+    # hash the sought node once, rather than resolving it per comparison
+    nodeHash = _canonical(node)
     for compNode in nodeList:
-        if isSameObject(node, compNode):
+        if _canonical(compNode) == nodeHash:
             return True
-    else:
-        return False
-    
+    return False
+
 def getNodeIndex(node, nodeList):
+    nodeHash = _canonical(node)
     for i, compNode in enumerate(nodeList):
-        if isSameObject(node, compNode):
+        if _canonical(compNode) == nodeHash:
             return i
-    else:
-        return None
+    return None
 
 def isSameObject(node1, node2):
-    return mel.eval('isSameObject("%s", "%s")' % (node1, node2))
+    obj1 = toMObject(node1)
+    obj2 = toMObject(node2)
+    if obj1 is None or obj2 is None:
+        return False
+    # two MObjectHandles hash equal iff they reference the same node
+    return (api.MObjectHandle(obj1).hashCode() ==
+            api.MObjectHandle(obj2).hashCode())
 #==============================================================================
 # Pymel Replacements
 #==============================================================================
 
+@contextlib.contextmanager
+def preservedSelection():
+    """
+    Context manager that snapshots the active selection as an
+    MSelectionList and restores it on exit - O(1) selection handles,
+    instead of stringifying the whole selection out through cmds.ls and
+    back through cmds.select.
+    """
+    savedSel = api.MSelectionList()
+    api.MGlobal.getActiveSelectionList(savedSel)
+    try:
+        yield savedSel
+    finally:
+        api.MGlobal.setActiveSelectionList(savedSel)
+
 def listForNone( res ):
     if res is None:
         return []
@@ -736,6 +911,20 @@ def getTranslation(transform, **kwargs):
         kwargs['worldSpace'] = True
     return cmds.xform(transform, q=1, translation=1, **kwargs)
 
+def _worldTranslations(nodes):
+    """
+    Returns a list of (x, y, z) world-space translations, one per given
+    dag node, read through the api in a single pass - much cheaper than
+    a cmds.xform command dispatch per node.
+    """
+    translations = []
+    for node in nodes:
+        dagPath = toMDagPath(node)
+        matrix = api.MTransformationMatrix(dagPath.inclusiveMatrix())
+        translation = matrix.getTranslation(api.MSpace.kWorld)
+        translations.append((translation.x, translation.y, translation.z))
+    return translations
+
 def getShapes( transform, **kwargs ):
     kwargs['shapes'] = True
     noIntermediate = kwargs.get('noIntermediate', kwargs.get('ni', None))
@@ -874,18 +1063,35 @@ def toMDagPath (nodeName):
         dagFn.getPath ( dagPath )
         return dagPath
 
-def loadObjPlugin():
-    if not cmds.pluginInfo('objExport', q=1, loaded=True ):
-        cmds.loadPlugin('objExport')
-
 #==============================================================================
 # PM Scripts Replacements
 #==============================================================================
 
+# cache for _inheritedTypes, keyed by node name - cleared on each
+# heatWeight entry, since nodes may come and go between invocations
+_inheritedTypesCache = {}
+
+def _inheritedTypes(node):
+    """
+    Returns the tuple of cmds.nodeType(inherited=True) results for the
+    given node (an empty tuple if it doesn't exist), cached so repeated
+    checks on the same node - eg, from getSkinClusters walking a long
+    history - don't redispatch objExists/nodeType each time.
+    """
+    try:
+        return _inheritedTypesCache[node]
+    except KeyError:
+        if cmds.objExists(node):
+            types = tuple(cmds.nodeType(node, inherited=True))
+        else:
+            types = ()
+        _inheritedTypesCache[node] = types
+        return types
+
 def isATypeOf(node, type):
     """Returns true if node is of the given type, or inherits from it."""
-    if isinstance(node, basestring) and cmds.objExists(node):
-        return type in cmds.nodeType(node, inherited=True)
+    if isinstance(node, basestring):
+        return type in _inheritedTypes(node)
     else:
         return False
     